@@ -6,13 +6,43 @@ Generate /licenses directory tree for fat images.
 """
 
 import argparse
+import functools
 import json
+import logging
 import os
+import random
 import sys
+import tempfile
+import time
 from pathlib import Path
-from typing import Dict, Optional
-from huggingface_hub import hf_hub_download, list_repo_files, model_info
-import requests
+from typing import Dict, Optional, Tuple
+
+# Cap how long huggingface_hub's own rate-limit backoff may sleep
+os.environ.setdefault("HF_HUB_HTTP_MAX_WAIT_TIME", "60")
+
+# Progress output goes to stderr; LOGLEVEL=WARNING silences the per-model spam
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format="%(message)s", stream=sys.stderr)
+log = logging.getLogger(__name__)
+
+# huggingface_hub and httpx are imported lazily where used so the
+# --help/argument-error paths do not pay their startup cost
+
+# Prefer orjson for JSON serialization; stdlib json is the fallback
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+
+@functools.lru_cache(maxsize=1)
+def _client():
+    """Shared HTTP/2 client for SPDX fetches, created on first use."""
+    import httpx
+    return httpx.Client(http2=True, timeout=10.0, transport=httpx.HTTPTransport(retries=3))
 
 
 # Canonical SPDX license texts (abbreviated - use full text in production)
@@ -35,30 +65,167 @@ Full text available at: https://opensource.org/licenses/MIT
 }
 
 
-def fetch_file_from_hf(repo_id: str, filename: str, revision: Optional[str] = None) -> Optional[str]:
+def retry(tries: int = 5, base: float = 1.0, cap: float = 30.0, jitter: float = 0.5):
+    """
+    Decorator retrying HF calls on transient failures with capped exponential backoff.
+
+    Retries connection errors and HTTP 5xx only — a 429 means we should back
+    off for the whole job, which huggingface_hub already handles, and other
+    4xx are permanent. A Retry-After header on the failed response takes
+    precedence over the computed delay.
+
+    Args:
+        tries: Total attempts including the first
+        base: Initial backoff in seconds, doubled per attempt
+        cap: Maximum backoff before jitter
+        jitter: Random multiplier range added on top of the backoff
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # huggingface_hub surfaces requests-based errors; requests is
+            # already loaded by the time any wrapped call can fail
+            from requests.exceptions import ConnectionError as RequestsConnectionError, HTTPError
+
+            for attempt in range(tries):
+                try:
+                    return func(*args, **kwargs)
+                except (HTTPError, RequestsConnectionError) as e:
+                    response = getattr(e, "response", None)
+                    status = getattr(response, "status_code", None)
+                    if attempt == tries - 1 or (status is not None and not 500 <= status < 600):
+                        raise
+                    delay = min(cap, base * 2 ** attempt) * (1 + random.uniform(0, jitter))
+                    retry_after = response.headers.get("Retry-After") if response is not None else None
+                    if retry_after:
+                        try:
+                            delay = float(retry_after)
+                        except ValueError:
+                            pass
+                    log.warning(f"  Transient error from HF ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+@retry()
+def _snapshot_download(**kwargs):
+    """Retrying snapshot_download wrapper; imports huggingface_hub on first use."""
+    from huggingface_hub import snapshot_download
+    return snapshot_download(**kwargs)
+
+
+def meta_cache_path(model_id: str) -> Path:
+    """Path of the on-disk metadata cache entry written by resolve_models.py."""
+    cache_dir = Path(os.environ.get("RUNNER_TEMP", tempfile.gettempdir())) / "hf_meta"
+    return cache_dir / (model_id.replace("/", "--") + ".json")
+
+
+def load_cached_license(model_id: str) -> Optional[str]:
+    """
+    Load the license ID from the metadata cache, if present.
+
+    Args:
+        model_id: HF model repository ID
+
+    Returns:
+        Cached SPDX license identifier, or None on cache miss
+    """
+    cache_path = meta_cache_path(model_id)
+    if not cache_path.exists():
+        return None
+    try:
+        cached = json.loads(cache_path.read_text())
+    except (OSError, json.JSONDecodeError) as e:
+        log.warning(f"  Warning: Could not read metadata cache: {e}")
+        return None
+    log.info(f"  Using cached metadata from {cache_path}")
+    return cached.get("license")
+
+
+def _read_first_match(snapshot_dir: Path, pattern: str, preferred: Tuple[str, ...]) -> Optional[str]:
     """
-    Fetch a file from HF repo.
+    Read the best match for a glob pattern in a snapshot directory.
+
+    Args:
+        snapshot_dir: Local snapshot directory
+        pattern: Glob pattern (e.g., LICENSE*)
+        preferred: Exact filenames ranked first, in order of preference
+
+    Returns:
+        Contents of the best match, or None if nothing matched
+    """
+    def rank(path: Path):
+        name = path.name
+        return (preferred.index(name) if name in preferred else len(preferred), name)
+
+    matches = sorted((p for p in snapshot_dir.glob(pattern) if p.is_file()), key=rank)
+    if matches:
+        return matches[0].read_text(encoding="utf-8")
+    return None
+
+
+def fetch_license_and_notice(repo_id: str, revision: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Fetch LICENSE and NOTICE files from an HF repo in one snapshot call.
+
+    snapshot_download resolves the matching file list server-side and
+    downloads the hits in parallel, instead of probing each candidate
+    filename with its own round-trip.
 
     Args:
         repo_id: HF model repository ID
-        filename: File to fetch (e.g., LICENSE, NOTICE)
         revision: Git revision/commit SHA
 
     Returns:
-        File contents as string, or None if not found
+        (license text, notice text), either of which may be None
     """
     try:
-        local_path = hf_hub_download(
+        local_dir = _snapshot_download(
             repo_id=repo_id,
-            filename=filename,
             revision=revision,
-            repo_type="model"
+            repo_type="model",
+            allow_patterns=["LICENSE*", "NOTICE*", "COPYING*"],
+            max_workers=4,
         )
-        with open(local_path, "r", encoding="utf-8") as f:
-            return f.read()
     except Exception as e:
-        print(f"  Could not fetch {filename}: {e}", file=sys.stderr)
-        return None
+        log.warning(f"  Could not fetch license files: {e}")
+        return None, None
+
+    snapshot_dir = Path(local_dir)
+    upstream_license = _read_first_match(
+        snapshot_dir, "LICENSE*", ("LICENSE", "LICENSE.md", "LICENSE.txt")
+    )
+    if upstream_license is None:
+        upstream_license = _read_first_match(
+            snapshot_dir, "COPYING*", ("COPYING", "COPYING.md", "COPYING.txt")
+        )
+    upstream_notice = _read_first_match(
+        snapshot_dir, "NOTICE*", ("NOTICE", "NOTICE.md", "NOTICE.txt")
+    )
+    return upstream_license, upstream_notice
+
+
+@functools.lru_cache(maxsize=64)
+def _spdx_text(spdx_id: str) -> Optional[str]:
+    """
+    Fetch raw canonical SPDX license text, cached per license ID.
+
+    Args:
+        spdx_id: SPDX license identifier
+
+    Returns:
+        Raw license text or None
+    """
+    try:
+        url = f"https://raw.githubusercontent.com/spdx/license-list-data/main/text/{spdx_id}.txt"
+        response = _client().get(url)
+        if response.status_code == 200:
+            return response.text
+    except Exception as e:
+        log.warning(f"  Could not fetch SPDX text for {spdx_id}: {e}")
+
+    return None
 
 
 def fetch_spdx_canonical_text(spdx_id: str) -> Optional[str]:
@@ -76,17 +243,13 @@ def fetch_spdx_canonical_text(spdx_id: str) -> Optional[str]:
         return SPDX_TEXTS[spdx_id.lower()]
 
     # Try to fetch from SPDX.org
-    try:
-        url = f"https://raw.githubusercontent.com/spdx/license-list-data/main/text/{spdx_id}.txt"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            return f"""[NOTE: This is canonical SPDX text for {spdx_id}.
+    text = _spdx_text(spdx_id)
+    if text is not None:
+        return f"""[NOTE: This is canonical SPDX text for {spdx_id}.
 The upstream repository did not include a LICENSE file.]
 
-{response.text}
+{text}
 """
-    except Exception as e:
-        print(f"  Could not fetch SPDX text for {spdx_id}: {e}", file=sys.stderr)
 
     return None
 
@@ -144,9 +307,9 @@ def harvest_licenses(model_id: str, revision: Optional[str], output_dir: str, li
         model_id: HF model repository ID
         revision: Git revision/commit SHA
         output_dir: Output directory for licenses
-        license_id: SPDX license identifier (optional, will fetch from HF if not provided)
+        license_id: SPDX license identifier (optional, falls back to the metadata cache)
     """
-    print(f"Harvesting licenses for {model_id} (revision: {revision or 'main'})", file=sys.stderr)
+    log.info(f"Harvesting licenses for {model_id} (revision: {revision or 'main'})")
 
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -155,45 +318,32 @@ def harvest_licenses(model_id: str, revision: Optional[str], output_dir: str, li
     model_license_dir = output_path / "model"
     model_license_dir.mkdir(exist_ok=True)
 
-    # Fetch model info if license not provided
+    # Check the metadata cache from resolve_models.py before hitting the network
     if not license_id:
-        try:
-            info = model_info(model_id, revision=revision)
-            license_id = getattr(info, "license", None)
-            if hasattr(info, "card_data") and info.card_data:
-                license_id = info.card_data.get("license", license_id)
-        except Exception as e:
-            print(f"  Warning: Could not fetch model info: {e}", file=sys.stderr)
-
-    # Fetch LICENSE from HF
-    upstream_license = fetch_file_from_hf(model_id, "LICENSE", revision)
-    if not upstream_license:
-        # Try alternative filenames
-        upstream_license = fetch_file_from_hf(model_id, "LICENSE.md", revision)
-    if not upstream_license:
-        upstream_license = fetch_file_from_hf(model_id, "LICENSE.txt", revision)
+        license_id = load_cached_license(model_id)
+
+    # The CI workflow always passes --license from the resolved matrix; when
+    # invoked ad-hoc without it, skip SPDX vendoring instead of re-querying HF
+    if not license_id:
+        log.warning("  Warning: No --license given and no cached metadata; SPDX vendoring disabled")
+
+    # Fetch LICENSE and NOTICE from HF in a single snapshot call
+    upstream_license, upstream_notice = fetch_license_and_notice(model_id, revision)
 
     has_upstream_license = upstream_license is not None
 
     # If no LICENSE found, try to vendor SPDX text
     if not upstream_license and license_id:
-        print(f"  No LICENSE file found, vendoring SPDX text for {license_id}", file=sys.stderr)
+        log.info(f"  No LICENSE file found, vendoring SPDX text for {license_id}")
         upstream_license = fetch_spdx_canonical_text(license_id)
 
     # Write model LICENSE
     if upstream_license:
         with open(model_license_dir / "LICENSE", "w", encoding="utf-8") as f:
             f.write(upstream_license)
-        print(f"  ✓ Wrote model LICENSE", file=sys.stderr)
+        log.info(f"  ✓ Wrote model LICENSE")
     else:
-        print(f"  ⚠ No LICENSE available for model", file=sys.stderr)
-
-    # Fetch NOTICE from HF
-    upstream_notice = fetch_file_from_hf(model_id, "NOTICE", revision)
-    if not upstream_notice:
-        upstream_notice = fetch_file_from_hf(model_id, "NOTICE.md", revision)
-    if not upstream_notice:
-        upstream_notice = fetch_file_from_hf(model_id, "NOTICE.txt", revision)
+        log.warning(f"  ⚠ No LICENSE available for model")
 
     has_upstream_notice = upstream_notice is not None
 
@@ -201,7 +351,7 @@ def harvest_licenses(model_id: str, revision: Optional[str], output_dir: str, li
     if upstream_notice:
         with open(model_license_dir / "NOTICE", "w", encoding="utf-8") as f:
             f.write(upstream_notice)
-        print(f"  ✓ Wrote model NOTICE", file=sys.stderr)
+        log.info(f"  ✓ Wrote model NOTICE")
 
     # Copy CC0 license (our infrastructure code)
     cc0_source = Path(__file__).parent.parent / "LICENSE"
@@ -210,7 +360,7 @@ def harvest_licenses(model_id: str, revision: Optional[str], output_dir: str, li
             cc0_text = f.read()
         with open(output_path / "CC0", "w", encoding="utf-8") as f:
             f.write(cc0_text)
-        print(f"  ✓ Wrote CC0 license", file=sys.stderr)
+        log.info(f"  ✓ Wrote CC0 license")
 
     # Generate project NOTICE
     project_notice = generate_project_notice(
@@ -221,7 +371,7 @@ def harvest_licenses(model_id: str, revision: Optional[str], output_dir: str, li
     )
     with open(output_path / "NOTICE", "w", encoding="utf-8") as f:
         f.write(project_notice)
-    print(f"  ✓ Wrote project NOTICE", file=sys.stderr)
+    log.info(f"  ✓ Wrote project NOTICE")
 
     # Generate OCI labels metadata
     oci_labels = {
@@ -231,10 +381,10 @@ def harvest_licenses(model_id: str, revision: Optional[str], output_dir: str, li
     }
 
     with open(output_path / "oci-labels.json", "w", encoding="utf-8") as f:
-        json.dump(oci_labels, f, indent=2)
-    print(f"  ✓ Wrote OCI labels metadata", file=sys.stderr)
+        f.write(_dumps(oci_labels))
+    log.info(f"  ✓ Wrote OCI labels metadata")
 
-    print(f"✓ License harvesting complete", file=sys.stderr)
+    log.info(f"✓ License harvesting complete")
 
 
 def main():
@@ -242,7 +392,7 @@ def main():
     parser = argparse.ArgumentParser(description="Harvest licenses from HuggingFace model repos")
     parser.add_argument("--id", required=True, help="Model ID (e.g., org/model-name)")
     parser.add_argument("--rev", help="Revision/commit SHA (optional)")
-    parser.add_argument("--license", help="SPDX license ID (optional, will auto-detect)")
+    parser.add_argument("--license", help="SPDX license ID (optional, falls back to the metadata cache)")
     parser.add_argument("--out", required=True, help="Output directory")
 
     args = parser.parse_args()
@@ -4,12 +4,62 @@ Parse models.yaml and resolve model metadata from Hugging Face.
 Outputs a JSON build matrix for GitHub Actions.
 """
 
+from __future__ import annotations
+
+import asyncio
 import json
+import logging
+import random
 import sys
 import os
-from typing import Any, Dict, List, Optional
-import yaml
-from huggingface_hub import HfApi, model_info, hf_hub_url
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Progress output goes to stderr; LOGLEVEL=WARNING silences the per-model spam
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format="%(message)s", stream=sys.stderr)
+log = logging.getLogger(__name__)
+
+# Prefer orjson for serializing the matrix; stdlib json is the fallback
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
+
+# Keep concurrent HF API requests bounded to stay under rate limits.
+HF_API_CONCURRENCY = 8
+HF_CONNECTOR_LIMIT = 16
+
+
+def meta_cache_path(model_id: str) -> Path:
+    """Path of the on-disk metadata cache entry shared with harvest_licenses.py."""
+    cache_dir = Path(os.environ.get("RUNNER_TEMP", tempfile.gettempdir())) / "hf_meta"
+    return cache_dir / (model_id.replace("/", "--") + ".json")
+
+
+def _write_meta_cache(
+    model_id: str,
+    license_id: Optional[str],
+    gated: Any,
+    revision: Optional[str],
+    card_data: Dict[str, Any],
+) -> None:
+    """Persist resolved metadata for later pipeline stages."""
+    cache_path = meta_cache_path(model_id)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({
+        "license": license_id,
+        "gated": gated,
+        "sha": revision,
+        "card_data": card_data,
+    }))
 
 
 def normalize_spdx(license_id: Optional[str]) -> Optional[str]:
@@ -19,13 +69,13 @@ def normalize_spdx(license_id: Optional[str]) -> Optional[str]:
     return license_id.lower().strip()
 
 
-def is_permissive(license_id: Optional[str], whitelist: List[str], override: Optional[str]) -> bool:
+def is_permissive(license_id: Optional[str], whitelist: FrozenSet[str], override: Optional[str]) -> bool:
     """
     Determine if a license is permissive.
 
     Args:
         license_id: SPDX license identifier from HF
-        whitelist: List of permissive SPDX IDs
+        whitelist: Set of normalized permissive SPDX IDs
         override: Manual override value (true/false/null)
 
     Returns:
@@ -37,20 +87,63 @@ def is_permissive(license_id: Optional[str], whitelist: List[str], override: Opt
     if not license_id:
         return False
 
-    normalized = normalize_spdx(license_id)
-    normalized_whitelist = [normalize_spdx(lid) for lid in whitelist]
+    return normalize_spdx(license_id) in whitelist
 
-    return normalized in normalized_whitelist
 
+async def _get_json_with_retry(
+    session: aiohttp.ClientSession,
+    url: str,
+    tries: int = 5,
+    base: float = 1.0,
+    cap: float = 30.0,
+    jitter: float = 0.5,
+) -> Dict[str, Any]:
+    """
+    GET a JSON document, retrying 5xx and connection errors with capped
+    exponential backoff plus jitter. A Retry-After header on the failed
+    response takes precedence over the computed delay. 4xx (including
+    429) are raised immediately.
+    """
+    import aiohttp
 
-def resolve_model(model_config: Dict[str, Any], defaults: Dict[str, Any], api: HfApi) -> Dict[str, Any]:
+    for attempt in range(tries):
+        delay = min(cap, base * 2 ** attempt) * (1 + random.uniform(0, jitter))
+        try:
+            async with session.get(url) as response:
+                if response.status >= 500 and attempt < tries - 1:
+                    retry_after = response.headers.get("Retry-After")
+                    if retry_after:
+                        try:
+                            delay = float(retry_after)
+                        except ValueError:
+                            pass
+                    log.warning(f"  HTTP {response.status} from HF, retrying in {delay:.1f}s")
+                else:
+                    response.raise_for_status()
+                    return await response.json()
+        except aiohttp.ClientConnectionError as e:
+            if attempt == tries - 1:
+                raise
+            log.warning(f"  Connection error ({e}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+async def resolve_model_async(
+    model_config: Dict[str, Any],
+    defaults: Dict[str, Any],
+    whitelist: FrozenSet[str],
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+) -> Dict[str, Any]:
     """
     Resolve a single model configuration.
 
     Args:
         model_config: Model configuration from models.yaml
         defaults: Default configuration values
-        api: HuggingFace API client
+        whitelist: Normalized permissive SPDX whitelist
+        session: Shared aiohttp session for HF API requests
+        sem: Semaphore bounding concurrent HF API requests
 
     Returns:
         Resolved model configuration for build matrix
@@ -61,36 +154,44 @@ def resolve_model(model_config: Dict[str, Any], defaults: Dict[str, Any], api: H
     permissive_override = model_config.get("permissive")
     gated_override = model_config.get("gated")
 
-    print(f"Resolving model: {model_id}", file=sys.stderr)
+    log.info(f"Resolving model: {model_id}")
 
     try:
         # Fetch model info from HF
-        info = model_info(model_id, revision=revision)
+        url = f"https://huggingface.co/api/models/{model_id}/revision/{revision or 'main'}"
+        async with sem:
+            info = await _get_json_with_retry(session, url)
 
         # Get license
-        license_id = getattr(info, "license", None)
-        if hasattr(info, "card_data") and info.card_data:
-            license_id = info.card_data.get("license", license_id)
+        license_id = info.get("license")
+        card_data = info.get("cardData") or {}
+        license_id = card_data.get("license", license_id)
 
         # Get gated status
-        gated = getattr(info, "gated", False)
+        gated = info.get("gated", False)
 
         # Resolve revision SHA
         if not revision:
-            revision = info.sha
+            revision = info.get("sha")
 
-        print(f"  License: {license_id}, Gated: {gated}, Revision: {revision}", file=sys.stderr)
+        log.info(f"  License: {license_id}, Gated: {gated}, Revision: {revision}")
+
+        # Cache resolved metadata so harvest_licenses.py can skip its own
+        # model_info call; the blocking disk write runs off the event loop
+        try:
+            await asyncio.to_thread(
+                _write_meta_cache, model_id, license_id, gated, revision, card_data
+            )
+        except OSError as e:
+            log.warning(f"  Warning: Could not write metadata cache: {e}")
 
     except Exception as e:
-        print(f"  Warning: Could not fetch model info: {e}", file=sys.stderr)
+        log.warning(f"  Warning: Could not fetch model info: {e}")
         license_id = None
         gated = False
         if not revision:
             revision = "main"
 
-    # Apply policy
-    whitelist = defaults["spdx_permissive_whitelist"]
-
     # Resolve permissive flag
     if permissive_override == "auto":
         permissive = is_permissive(license_id, whitelist, None)
@@ -138,50 +239,88 @@ def resolve_model(model_config: Dict[str, Any], defaults: Dict[str, Any], api: H
         "hf_cache_dir": defaults["hf_cache_dir"],
     }
 
-    print(f"  Build fat: {build_fat}, Image: {image_name}", file=sys.stderr)
+    log.info(f"  Build fat: {build_fat}, Image: {image_name}")
 
     return matrix_entry
 
 
+async def _resolve_all(
+    models: List[Dict[str, Any]],
+    defaults: Dict[str, Any],
+    whitelist: FrozenSet[str],
+) -> List[Dict[str, Any]]:
+    """
+    Resolve all model configurations concurrently.
+
+    Args:
+        models: Model configurations from models.yaml
+        defaults: Default configuration values
+        whitelist: Normalized permissive SPDX whitelist
+
+    Returns:
+        List of resolved matrix entries (failed entries are skipped)
+    """
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=HF_CONNECTOR_LIMIT)
+    sem = asyncio.Semaphore(HF_API_CONCURRENCY)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await asyncio.gather(
+            *[resolve_model_async(m, defaults, whitelist, session, sem) for m in models],
+            return_exceptions=True,
+        )
+
+    matrix = []
+    for model_config, result in zip(models, results):
+        if isinstance(result, BaseException):
+            log.error(f"Error resolving model {model_config.get('id', 'unknown')}: {result}")
+            continue
+        matrix.append(result)
+
+    return matrix
+
+
 def main():
     """Main entry point."""
     if len(sys.argv) < 2:
-        print("Usage: resolve_models.py <models.yaml>", file=sys.stderr)
+        log.error("Usage: resolve_models.py <models.yaml>")
         sys.exit(1)
 
     config_file = sys.argv[1]
 
+    # Deferred so the usage path above doesn't pay the import cost;
+    # prefer the libyaml-backed loader with pure-Python SafeLoader fallback
+    import yaml
+    try:
+        from yaml import CSafeLoader as _YamlLoader
+    except ImportError:
+        from yaml import SafeLoader as _YamlLoader
+
     # Load configuration
     with open(config_file, "r") as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=_YamlLoader)
 
     defaults = config.get("defaults", {})
     models = config.get("models", [])
 
     if not models:
-        print("No models defined in configuration", file=sys.stderr)
+        log.error("No models defined in configuration")
         sys.exit(1)
 
-    # Initialize HF API
-    api = HfApi()
+    # Normalize the permissive whitelist once for O(1) membership checks
+    whitelist = frozenset(normalize_spdx(lid) for lid in defaults["spdx_permissive_whitelist"])
 
-    # Resolve all models
-    matrix = []
-    for model_config in models:
-        try:
-            matrix_entry = resolve_model(model_config, defaults, api)
-            matrix.append(matrix_entry)
-        except Exception as e:
-            print(f"Error resolving model {model_config.get('id', 'unknown')}: {e}", file=sys.stderr)
-            continue
+    # Resolve all models concurrently
+    matrix = asyncio.run(_resolve_all(models, defaults, whitelist))
 
     if not matrix:
-        print("No models could be resolved", file=sys.stderr)
+        log.error("No models could be resolved")
         sys.exit(1)
 
     # Output JSON matrix
     output = {"include": matrix}
-    print(json.dumps(output, indent=2))
+    sys.stdout.write(_dumps(output) + "\n")
 
 
 if __name__ == "__main__":
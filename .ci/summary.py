@@ -8,13 +8,14 @@ import json
 import sys
 
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+
 def format_size(bytes_size: int) -> str:
     """Format bytes as human-readable size."""
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if bytes_size < 1024.0:
-            return f"{bytes_size:.2f} {unit}"
-        bytes_size /= 1024.0
-    return f"{bytes_size:.2f} PB"
+    # Unit index straight from the magnitude: 10 bits per 1024x step
+    idx = min((max(bytes_size, 1).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{bytes_size / (1 << (idx * 10)):.2f} {_SIZE_UNITS[idx]}"
 
 
 def generate_summary(matrix_entry: dict, reg_ghcr: str = "ghcr.io/13fragments", reg_dh: str = "13fragments") -> str:
@@ -39,7 +40,7 @@ def generate_summary(matrix_entry: dict, reg_ghcr: str = "ghcr.io/13fragments",
     image = matrix_entry["image"]
     version = matrix_entry["version"]
 
-    summary = f"""## Build Summary: {model_id}
+    parts = [f"""## Build Summary: {model_id}
 
 ### Model Information
 - **Model ID**: `{model_id}`
@@ -50,46 +51,36 @@ def generate_summary(matrix_entry: dict, reg_ghcr: str = "ghcr.io/13fragments",
 - **Gated**: `{gated}`
 
 ### Build Decision
-"""
+- **Slim Image**: ✅ Built
+"""]
 
     if build_fat:
-        summary += "- **Slim Image**: ✅ Built\n"
-        summary += "- **Fat Image**: ✅ Built (permissive, non-gated)\n"
+        parts.append("- **Fat Image**: ✅ Built (permissive, non-gated)\n")
+    elif gated:
+        parts.append("- **Fat Image**: ❌ Skipped (gated model)\n")
+    elif not permissive:
+        parts.append("- **Fat Image**: ❌ Skipped (non-permissive license)\n")
     else:
-        summary += "- **Slim Image**: ✅ Built\n"
-        if gated:
-            summary += "- **Fat Image**: ❌ Skipped (gated model)\n"
-        elif not permissive:
-            summary += "- **Fat Image**: ❌ Skipped (non-permissive license)\n"
-        else:
-            summary += "- **Fat Image**: ❌ Skipped (unknown reason)\n"
-
-    summary += f"""
-### Image Tags
-
-**Slim**:
-"""
+        parts.append("- **Fat Image**: ❌ Skipped (unknown reason)\n")
 
-    # Generate tag list
-    if matrix_entry.get("publish_ghcr", True):
-        summary += f"- `{reg_ghcr}/{image}:{version}-slim`\n"
-        summary += f"- `{reg_ghcr}/{image}:r{revision[:7]}-slim`\n"
+    parts.append("\n### Image Tags\n")
 
+    # Generate tag list: one pass over enabled registries per built variant
+    rev7 = revision[:7]
+    registries = []
+    if matrix_entry.get("publish_ghcr", True):
+        registries.append(reg_ghcr)
     if matrix_entry.get("publish_dh", True):
-        summary += f"- `{reg_dh}/{image}:{version}-slim`\n"
-        summary += f"- `{reg_dh}/{image}:r{revision[:7]}-slim`\n"
-
-    if build_fat:
-        summary += "\n**Fat**:\n"
-        if matrix_entry.get("publish_ghcr", True):
-            summary += f"- `{reg_ghcr}/{image}:{version}-fat`\n"
-            summary += f"- `{reg_ghcr}/{image}:r{revision[:7]}-fat`\n"
+        registries.append(reg_dh)
+    variants = ["slim"] + (["fat"] if build_fat else [])
 
-        if matrix_entry.get("publish_dh", True):
-            summary += f"- `{reg_dh}/{image}:{version}-fat`\n"
-            summary += f"- `{reg_dh}/{image}:r{revision[:7]}-fat`\n"
+    for variant in variants:
+        parts.append(f"\n**{variant.title()}**:\n")
+        for reg in registries:
+            parts.append(f"- `{reg}/{image}:{version}-{variant}`\n"
+                         f"- `{reg}/{image}:r{rev7}-{variant}`\n")
 
-    summary += f"""
+    parts.append(f"""
 ### Compliance
 - **Licenses Bundled**: {'✅ Yes (/licenses/)' if build_fat else 'N/A (slim only)'}
 - **OCI Labels**: ✅ Applied
@@ -104,20 +95,20 @@ docker run -p 8000:8000 \\
   -e HUGGING_FACE_HUB_TOKEN=your_token \\
   {reg_ghcr}/{image}:{version}-slim
 ```
-"""
+""")
 
     if build_fat:
-        summary += f"""
+        parts.append(f"""
 **Fat** (model embedded):
 ```bash
 docker run -p 8000:8000 \\
   {reg_ghcr}/{image}:{version}-fat
 ```
-"""
+""")
 
-    summary += "\n---\n"
+    parts.append("\n---\n")
 
-    return summary
+    return "".join(parts)
 
 
 def main():